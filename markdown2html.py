@@ -4,6 +4,7 @@ markdown2html.py: A script to convert a Markdown file to an HTML file.
 
 Usage:
     ./markdown2html.py <input_markdown_file> <output_html_file>
+    ./markdown2html.py --batch <markdown_glob> <output_dir>
 
     - The script takes two arguments:
         1. The name of the Markdown file to read (input).
@@ -13,6 +14,8 @@ Usage:
     it prints an error message and exits.
     - If the Markdown file doesn’t exist,
     it prints an error message and exits.
+    - With --batch, every file matching the glob is converted in parallel
+      and written to <output_dir> with its extension replaced by .html.
     - The script parses headings, unordered lists, ordered lists, paragraphs,
       and bold/emphasized text in Markdown format and converts them to HTML.
 
@@ -31,33 +34,294 @@ Markdown Syntax Supported:
 
 Exit codes:
     - 0: Success
-    - 1: Error (wrong number of arguments or missing file)
+    - 1: Error (wrong number of arguments, missing file, or in batch mode
+      no matching file or two inputs with the same output name)
 
 Example:
     ./markdown2html.py README.md README.html
+    ./markdown2html.py --batch 'docs/*.md' html
 """
 
 import sys
 import os
+import io
+import glob
 import re
 import hashlib
+from functools import lru_cache
+from multiprocessing import Pool
+
+
+_INLINE_TAGS = {'**': ('<b>', '</b>'), '__': ('<em>', '</em>')}
+# Opening and closing heading tags indexed by heading level
+HTAGS = [None] + [(f"<h{i}>", f"</h{i}>\n") for i in range(1, 7)]
+# Bound format method of the list item template
+LI = "<li>{}</li>\n".format
+# Longest line, in characters, whose conversion is memoized
+CACHED_LINE_MAX = 80
+_HASH_RE = re.compile(r'(#{1,6})(?: \s*|$)')
+_HASH_LINK_RE = re.compile(r'\[\[(.+?)\]\]')
+_STRIP_C_RE = re.compile(r'\(\((.+?)\)\)')
+
+
+def _inline(line):
+    """Convert bold and emphasis markup in a single scan of the line."""
+    parts = []
+    i = 0
+    bold = line.find('**')
+    em = line.find('__')
+    while bold >= 0 or em >= 0:
+        if em < 0 or 0 <= bold < em:
+            start, delim = bold, '**'
+        else:
+            start, delim = em, '__'
+        end = line.find(delim, start + 3)
+        if end < 0:
+            # Nothing further on can close this delimiter, stop looking for it
+            if delim == '**':
+                bold = -1
+            else:
+                em = -1
+            continue
+        open_tag, close_tag = _INLINE_TAGS[delim]
+        parts.append(line[i:start])
+        parts.append(open_tag)
+        parts.append(_inline(line[start + 2:end]))
+        parts.append(close_tag)
+        i = end + 2
+        # A delimiter with no closer stays at -1, and one found past this
+        # span is still the next occurrence, so neither is searched again
+        if 0 <= bold < i:
+            bold = line.find('**', i)
+        if 0 <= em < i:
+            em = line.find('__', i)
+    parts.append(line[i:])
+    return ''.join(parts)
+
+
+def _convert_line(line):
+    """Convert a single line of markdown to HTML, without caching."""
+    line = _inline(line)
+    line = _HASH_LINK_RE.sub(
+        lambda m: hashlib.md5(m.group(1).encode()).hexdigest(), line)
+    line = _STRIP_C_RE.sub(
+        lambda m: m.group(1).replace('c', '').replace('C', ''), line)
+
+    return line
+
+
+# Only short lines are memoized, so the cache stays small whatever the input
+_convert_short_line = lru_cache(maxsize=4096)(_convert_line)
 
 
 def convert_line_to_html(line):
     """Convert a single line of markdown to HTML."""
-    line = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', line)
-    line = re.sub(r'__(.+?)__', r'<em>\1</em>', line)
-    line = re.sub(r'\[\[(.+?)\]\]',
-                  lambda m: hashlib.md5(m.group(1).encode()).hexdigest(),
-                  line)
-    line = re.sub(r'\(\((.+?)\)\)',
-                  lambda m: m.group(1).replace('c', '').replace('C', ''),
-                  line)
+    if len(line) <= CACHED_LINE_MAX:
+        return _convert_short_line(line)
+    return _convert_line(line)
 
-    return line
+
+def _flush_paragraph(state, append):
+    """Emit the pending paragraph, if any."""
+    if not state['paragraph_empty']:
+        paragraph_text = state['paragraph'].getvalue().strip()
+        append(f"<p>{paragraph_text}</p>\n")
+        state['paragraph'] = io.StringIO()
+        state['paragraph_empty'] = True
+
+
+def _close_list(state, append):
+    """Close the open <ul> or <ol>, if any."""
+    if state['list']:
+        append(f"</{state['list']}>\n")
+        state['list'] = None
+
+
+def _emit_heading(line, state, append):
+    """Emit a heading; lines without a valid marker are paragraph text."""
+    m = _HASH_RE.match(line)
+    if not m:
+        _emit_paragraph_line(line, state, append)
+        return
+    _flush_paragraph(state, append)
+    _close_list(state, append)
+    open_tag, close_tag = HTAGS[len(m.group(1))]
+    append(open_tag)
+    append(line[m.end():])
+    append(close_tag)
+
+
+def _emit_list_item(line, state, append, kind):
+    """Emit a list item, switching to a <ul> or <ol> if needed."""
+    if state['list'] != kind:
+        _flush_paragraph(state, append)
+        _close_list(state, append)
+        append(f"<{kind}>\n")
+        state['list'] = kind
+    list_item = line[2:].lstrip()
+    append(LI(convert_line_to_html(list_item)))
+
+
+def _emit_ul_item(line, state, append):
+    """Emit an unordered list item ('- ')."""
+    _emit_list_item(line, state, append, 'ul')
+
+
+def _emit_ol_item(line, state, append):
+    """Emit an ordered list item ('* ')."""
+    _emit_list_item(line, state, append, 'ol')
+
+
+def _emit_paragraph_line(line, state, append):
+    """Add a line to the current paragraph (including bold and emphasis)."""
+    _close_list(state, append)
+    if state['paragraph_empty']:
+        state['paragraph'].write(convert_line_to_html(line))
+        state['paragraph_empty'] = False
+    else:
+        state['paragraph'].write(' <br/>')
+        state['paragraph'].write(_inline(line))
+
+
+def _end_blocks(line, state, append):
+    """Flush the current paragraph and close any open list.
+
+    At most one of them is open: starting a list flushes the paragraph
+    and a paragraph line closes the list, so the order does not matter.
+    """
+    _flush_paragraph(state, append)
+    _close_list(state, append)
+
+
+# Matches every line of the document, leading and trailing whitespace
+# excluded (any str.isspace character, as str.strip() would remove);
+# the named group that took part tells which kind of block the line is,
+# and no group at all means an empty line
+_BLOCK_RE = re.compile(r'''
+    ^[^\S\n]*
+    (?:
+        (?P<heading>\#(?:.*\S)?)
+      | (?P<ul>-[ ][^\S\n]*\S(?:.*\S)?)
+      | (?P<ol>\*[ ][^\S\n]*\S(?:.*\S)?)
+      | (?P<paragraph>\S(?:.*\S)?)
+    )?
+    [^\S\n]*$
+''', re.M | re.X)
+
+# Number of characters read from the input at a time
+CHUNK_SIZE = 1 << 20
+
+# Block handlers keyed by the _BLOCK_RE group that matched
+HANDLERS = {
+    'heading': _emit_heading,
+    'ul': _emit_ul_item,
+    'ol': _emit_ol_item,
+    'paragraph': _emit_paragraph_line,
+    None: _end_blocks,
+}
+
+
+def _new_state():
+    """Return the block state shared by the handlers of one document."""
+    return {
+        'list': None,
+        'paragraph': io.StringIO(),
+        'paragraph_empty': True,
+    }
+
+
+def process_lines(text, state, append):
+    """Convert the lines of text, carrying open blocks over in state.
+
+    text must not end with the newline of its last line, since that
+    would read as one more, empty, line and close the open blocks.
+    """
+    handlers = HANDLERS
+    for m in _BLOCK_RE.finditer(text):
+        kind = m.lastgroup
+        handlers[kind](m.group(kind) if kind else None, state, append)
+
+
+def convert_file(pair):
+    """Convert the Markdown file pair[0] to the HTML file pair[1].
+
+    The input is read CHUNK_SIZE characters at a time and only complete
+    lines are converted, the rest being carried over to the next chunk,
+    so memory use is bounded by the longest line rather than by the size
+    of the file.
+    """
+    input_file, output_file = pair
+    state = _new_state()
+    out = []
+    append = out.append
+    # Pieces of the line still waiting for its newline, kept as a list so
+    # that a very long line is joined once instead of once per chunk
+    pending = []
+
+    with open(input_file, 'r', encoding='utf-8') as infile, \
+            open(output_file, 'wb') as outfile:
+        while chunk := infile.read(CHUNK_SIZE):
+            end = chunk.rfind('\n')
+            if end < 0:
+                pending.append(chunk)
+                continue
+            pending.append(chunk[:end])
+            process_lines(''.join(pending), state, append)
+            pending = [chunk[end + 1:]]
+            outfile.write(''.join(out).encode())
+            out.clear()
+
+        # Convert the last line and close whatever is still open
+        process_lines(''.join(pending), state, append)
+        _end_blocks(None, state, append)
+        outfile.write(''.join(out).encode())
 
 
 if __name__ == "__main__":
+    # Batch mode: convert every file matching a glob in parallel
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        if len(sys.argv) < 4:
+            print("Usage: ./markdown2html.py --batch '*.md' html_dir",
+                  file=sys.stderr)
+            sys.exit(1)
+
+        pattern = sys.argv[2]
+        out_dir = sys.argv[3]
+        pairs = [
+            (path, os.path.join(
+                out_dir, os.path.splitext(os.path.basename(path))[0] + '.html'
+            ))
+            for path in glob.glob(pattern)
+        ]
+
+        if not pairs:
+            print(f"No files match {pattern}", file=sys.stderr)
+            sys.exit(1)
+
+        # Inputs with the same name in different directories would
+        # overwrite each other's output
+        sources = {}
+        for path, html_path in pairs:
+            # Opening the output would truncate the input before it is read
+            if os.path.realpath(path) == os.path.realpath(html_path):
+                print(f"Error: {path} would be overwritten by its own output",
+                      file=sys.stderr)
+                sys.exit(1)
+            if html_path in sources:
+                print(f"Error: {sources[html_path]} and {path} would both "
+                      f"be written to {html_path}", file=sys.stderr)
+                sys.exit(1)
+            sources[html_path] = path
+
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            with Pool() as pool:
+                pool.map(convert_file, pairs)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
     # Check the number of arguments
     if len(sys.argv) < 3:
         print("Usage: ./markdown2html.py README.md README.html",
@@ -68,85 +332,17 @@ if __name__ == "__main__":
     input_file = sys.argv[1]
     output_file = sys.argv[2]
 
-    # Check if the input file exists
-    if not os.path.exists(input_file):
-        print(f"Missing {input_file}", file=sys.stderr)
-        sys.exit(1)
-
     try:
-        with open(input_file, 'r') as infile, \
-                open(output_file, 'w') as outfile:
-            in_unordered_list = False
-            in_ordered_list = False
-            paragraph_content = []
-
-            for line in infile:
-                line = line.strip()
-
-                # Handle empty lines for paragraphs
-                if not line:
-                    if paragraph_content:
-                        paragraph_text = ' '.join(paragraph_content).strip()
-                        outfile.write(f"<p>{paragraph_text}</p>\n")
-                        paragraph_content = []
-                    if in_unordered_list:
-                        outfile.write("</ul>\n")
-                        in_unordered_list = False
-                    if in_ordered_list:
-                        outfile.write("</ol>\n")
-                        in_ordered_list = False
-                    continue
-
-                # Check for headings
-                if line.startswith('#'):
-                    heading_level = len(line.split(' ')[0])
-                    if 1 <= heading_level <= 6:
-                        heading_content = line[heading_level:].strip()
-                        outfile.write(
-                            f"<h{heading_level}>"
-                            f"{heading_content}</h{heading_level}>\n"
-                        )
-                    continue
-
-                # Handle unordered lists
-                if line.startswith('- '):
-                    if not in_unordered_list:
-                        outfile.write("<ul>\n")
-                        in_unordered_list = True
-                    list_item = line[2:].strip()
-                    list_item_html = convert_line_to_html(list_item)
-                    outfile.write(f"<li>{list_item_html}</li>\n")
-                    continue
-
-                # Handle ordered lists
-                if line.startswith('* '):
-                    if not in_ordered_list:
-                        outfile.write("<ol>\n")
-                        in_ordered_list = True
-                    list_item = line[2:].strip()
-                    list_item_html = convert_line_to_html(list_item)
-                    outfile.write(f"<li>{list_item_html}</li>\n")
-                    continue
-
-                # Handle paragraph content (including bold and emphasis)
-                line = line.replace('**', '<b>', 1).replace('__', '<em>', 1)
-                line = line.replace('**', '</b>', 1).replace('__', '</em>', 1)
-                if paragraph_content:
-                    paragraph_content.append(f"<br/>{line}")
-                else:
-                    paragraph_content.append(convert_line_to_html(line))
-
-            # Close any remaining paragraph at the end of the file
-            if paragraph_content:
-                paragraph_text = ' '.join(paragraph_content).strip()
-                outfile.write(f"<p>{paragraph_text}</p>\n")
-
-            if in_unordered_list:
-                outfile.write("</ul>\n")
-            if in_ordered_list:
-                outfile.write("</ol>\n")
-
-        sys.exit(0)
+        convert_file((input_file, output_file))
+    except FileNotFoundError as e:
+        # Only a missing input is reported as such
+        if e.filename == input_file:
+            print(f"Missing {input_file}", file=sys.stderr)
+        else:
+            print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+
+    sys.exit(0)